@@ -19,11 +19,12 @@ from rule_based import RuleBasedControllerDiscrete
 if __name__ == "__main__":
 
     env_name = 'Eplus-A403mediumfanger-hot-discrete'  # use the same environment name
+    N_ENVS = 4  # replicate count; controller cost amortizes across the batch
 
-    print(f"--- Creating environment '{env_name}'... ---")
+    print(f"--- Creating {N_ENVS} x environment '{env_name}'... ---")
 
-
-    env = gym.make(env_name)
+    env = gym.vector.SyncVectorEnv(
+        [lambda: gym.make(env_name) for _ in range(N_ENVS)])
 
     print("--- Environment created successfully! ---")
 
@@ -34,16 +35,18 @@ if __name__ == "__main__":
     # print("Action Space Type:", env.action_space)
     # print("Actuator Names (the 'key' for the action array):", list(env.spec.kwargs['actuators'].keys()))
 
-    action_mapping_function = env.get_wrapper_attr('action_mapping')
-
-    # Action mapping'i bir kere görmek istersen:
-    for action_number in range(env.action_space.n):
-        try:
-            real_action_values = action_mapping_function(action_number)
-            print(f"Action {action_number}: {real_action_values}")
-        except IndexError:
-            print(f"Action {action_number}: [ERROR - This action is not defined in the mapping!]")
-    print("-----------------------")
+    # Action mapping'i görmek istersen VERBOSE_ACTION_DUMP = True yap;
+    # tamamen tanısal olduğu için varsayılan olarak atlanır (açılış hızı).
+    VERBOSE_ACTION_DUMP = False
+    if __debug__ and VERBOSE_ACTION_DUMP:
+        action_mapping_function = env.envs[0].get_wrapper_attr('action_mapping')
+        for action_number in range(env.single_action_space.n):
+            try:
+                real_action_values = action_mapping_function(action_number)
+                print(f"Action {action_number}: {real_action_values}")
+            except IndexError:
+                print(f"Action {action_number}: [ERROR - This action is not defined in the mapping!]")
+        print("-----------------------")
 
     print("--- Resetting environment... ---")
     observation, info = env.reset()
@@ -51,38 +54,37 @@ if __name__ == "__main__":
     # Artık CRAZY yerine RULE-BASED controller kullanıyoruz
     controller = RuleBasedControllerDiscrete()
 
-    rewards = []
-
-    print(f"--- Starting simulation loop (100 steps) ---")
+    print(f"--- Starting simulation loop ---")
     step_count = 8640
-    temp_patience = 0
-    co2_patience = 0
+    rewards = np.empty((step_count, N_ENVS), dtype=np.float32)
+    temp_patience = np.zeros(N_ENVS, dtype=np.int64)
+    co2_patience = np.zeros(N_ENVS, dtype=np.int64)
     for i in range(step_count):
-        terminated = False
-        truncated = False
-
         # Dilersen info'dan ay bilgisi vs kullanabilirsin
         # current_month = info['month']
 
-        # Controller'dan action al
+        # Controller'dan batch halinde action al
         action, temp_patience, co2_patience = controller.act(observation,temp_patience,co2_patience)
 
-        # Ortamda bir adım at
+        # Tüm ortamlarda bir adım at (SyncVectorEnv biten ortamı kendisi resetler)
         observation, reward, terminated, truncated, info = env.step(action)
-        rewards.append(reward)
+        rewards[i] = reward
 
         print(f"Step: {i+1}/{step_count}, ")
-        print(f"Month:{observation[0]}, Action:{action}, Temperature:{observation[7]:.4f}")
-        print(f"CO2:{observation[10]:.4f}, Reward: {reward:.4f}, Occupancy: {observation[9]}")
-        print(f"Temperature Patience {temp_patience}, CO2 Patience {co2_patience}")
+        print(f"Month:{observation[0,0]}, Action:{action[0]}, Temperature:{observation[0,7]:.4f}")
+        print(f"CO2:{observation[0,10]:.4f}, Reward: {reward[0]:.4f}, Occupancy: {observation[0,9]}")
+        print(f"Temperature Patience {temp_patience[0]}, CO2 Patience {co2_patience[0]}")
 
-        if terminated or truncated:
-            print(f"--- Episode finished at step {i+1}, resetting... ---")
-            observation, info = env.reset()
+        done = np.logical_or(terminated, truncated)
+        if done.any():
+            # Autoreset ortamı sıfırlar; patience sayaçları da sıfırlanmalı
+            temp_patience[done] = 0
+            co2_patience[done] = 0
+            print(f"--- Episode finished in envs {np.flatnonzero(done)} at step {i+1} ---")
 
     print("\n--- EPISODE FINISHED ---")
-    print(f"Episode Mean reward: {np.mean(rewards):.4f}")
-    print(f"Episode Cumulative reward: {sum(rewards):.2f}")
+    print(f"Episode Mean reward: {rewards.mean():.4f}")
+    print(f"Episode Cumulative reward (per env): {rewards.sum() / N_ENVS:.2f}")
     print("--------------------------\n")
 
     env.close()
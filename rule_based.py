@@ -1,6 +1,15 @@
 # rule_based.py
+import bisect
+import math
+
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to plain Python
+    def njit(*args, **kwargs):
+        return lambda f: f
+
 # ----- ACTION MAPPING (0–39) -----
 DISCRETE_ACTIONS = [
     [21, 22, 1.0, 0.0],  # 0
@@ -67,26 +76,107 @@ DISCRETE_ACTIONS_CO2 = [
 ]
 
 TEMP_THRESHOLD = 1  # steps before patience bumps the discrete index
+MAX_PATIENCE = 16   # table cap; shifts saturate well before this anyway
 
-DISCRETE_ACTIONS = np.array(DISCRETE_ACTIONS, dtype=float)
+DISCRETE_ACTIONS = np.array(DISCRETE_ACTIONS, dtype=np.float32, order='C')
 DISCRETE_ACTIONS_TEMP = np.array(DISCRETE_ACTIONS_TEMP, dtype=float)
 DISCRETE_ACTIONS_CO2 = np.array(DISCRETE_ACTIONS_CO2, dtype=float)
 
+# Squared row norms, so the nearest-action fallback can use
+# ||a-q||^2 = ||a||^2 - 2 a.q (+ ||q||^2, constant under argmin).
+_DA_SQNORMS = (DISCRETE_ACTIONS ** 2).sum(axis=1)
+
+# Highest valid index in each grid, hoisted out of the hot path.
+_MAX_TEMP_IDX = DISCRETE_ACTIONS_TEMP.shape[0] - 1
+_MAX_CO2_IDX = DISCRETE_ACTIONS_CO2.shape[0] - 1
+
+# Exact-match lookup table: (htg_sp, clg_sp, fan, wf) -> action index.
+# act() always builds desired_action from the discrete grids above, so the
+# key is present and the O(1) lookup replaces a 40-row norm + argmin scan.
+ACTION_LUT = {tuple(row): i for i, row in enumerate(DISCRETE_ACTIONS.tolist())}
+
+# WF speed -> index in DISCRETE_ACTIONS_CO2 (exact values only).
+CO2_IDX = {0.0: 0, 0.5: 1, 0.75: 2, 1.0: 3}
+
+# CO2 thresholds (ppm) and the WF speed chosen in each band.
+_CO2_BOUNDS = [800.0, 1000.0, 1200.0]
+_CO2_SPEEDS = [0.0, 0.5, 0.75, 1.0]
+_CO2_BOUNDS_ARR = np.array(_CO2_BOUNDS)
+
+
+@njit(cache=True)
+def _act_core(month, air_temp, air_co2, temp_patience, co2_patience,
+              comfort_lo, comfort_hi):
+    """
+    Scalar hot path of the controller, kept module-level so Numba can
+    compile it. Returns (action_idx, temp_patience, co2_patience).
+    """
+    t_low = comfort_lo[month]
+    t_high = comfort_hi[month]
+    target_temp = 0.5 * (t_low + t_high)
+
+    # Evaluate the band comparisons once; patience update, the AC on/off
+    # decision and the index adjust below all reuse them.
+    hot = air_temp > t_high
+    cold = air_temp < t_low
+    out_of_band = hot or cold
+
+    # --- Update patience counters properly ---
+    temp_patience = temp_patience + 1 if out_of_band else 0
+    co2_patience = co2_patience + 1 if air_co2 > 800 else 0
+
+    # Decide if AC should be on or off-like
+    ac_on = out_of_band
+
+    # WF speed band from CO2; the band index IS the CO2 action index.
+    base_co2_idx = np.searchsorted(_CO2_BOUNDS_ARR, air_co2, side='right')
+
+    temp_patience_residual = temp_patience // TEMP_THRESHOLD
+    co2_patience_residual = co2_patience // TEMP_THRESHOLD
+
+    # Temp index: heating setpoint row, shifted by patience
+    if not ac_on:
+        temp_index = 0
+    else:
+        # Scalar floor + min/max: no 0-d ndarray round trips via np.clip
+        base_temp_idx = max(21, min(29, int(math.floor(target_temp)))) - 20
+
+        if hot:
+            temp_index = max(base_temp_idx - temp_patience_residual, 1)
+        elif cold:
+            temp_index = min(base_temp_idx + temp_patience_residual,
+                             _MAX_TEMP_IDX)
+        else:
+            temp_index = base_temp_idx
+
+    #  Clamp indices to their valid ranges
+    temp_index = max(0, min(temp_index, _MAX_TEMP_IDX))
+    co2_index = max(0, min(base_co2_idx + co2_patience_residual,
+                           _MAX_CO2_IDX))
+
+    # Map (temp_index, co2_index) straight to the 40-action index
+    if temp_index == 0:
+        action_idx = 36 + co2_index
+    else:
+        action_idx = (temp_index - 1) * 4 + co2_index
+
+    return action_idx, temp_patience, co2_patience
+
 
 class RuleBasedControllerDiscrete:
     """
     Simple rule-based controller for the Sinergym smart room environment.
     
-    Observation vector:
+    Observation vector (per environment):
       [month, day_of_month, hour, outdoor_temperature, outdoor_humidity,
        htg_setpoint, clg_setpoint, air_temperature, air_humidity,
        people_occupant, air_co2, window_fan_energy, pmv, ppd,
        total_electricity_HVAC]
 
-    Returns:
-      action_idx (int in [0, 39]),
-      temp_patience (int),
-      co2_patience (int)
+    act() is batched over N environments and returns:
+      action_idx (int array in [0, 39], shape (N,)),
+      temp_patience (int array, shape (N,)),
+      co2_patience (int array, shape (N,))
     """
 
     def __init__(self,
@@ -94,35 +184,78 @@ class RuleBasedControllerDiscrete:
                  temp_margin=0.5):
         self.winter_months = set(winter_months)
         self.temp_margin = temp_margin
-
-    def _get_comfort_range(self, month: int):
-        """Return (low, high) comfort temperature range depending on month."""
-        if month in self.winter_months:
-            # Winter comfort
-            return 20.0, 23.0
-        else:
-            # Summer comfort
-            return 23.0, 26.0
+        # Comfort (low, high) per month, indexed 1..12 directly. Kept as two
+        # contiguous float arrays so _act_core can take them as arguments.
+        self._comfort_lo = np.full(13, 23.0)
+        self._comfort_hi = np.full(13, 26.0)
+        for m in self.winter_months:
+            self._comfort_lo[m] = 20.0
+            self._comfort_hi[m] = 23.0
+
+        # Patience transition LUT: [out_of_band, current] -> next counter,
+        # saturating at MAX_PATIENCE (index shifts max out long before that).
+        self._patience_next = np.zeros((2, MAX_PATIENCE + 1), dtype=np.int64)
+        self._patience_next[1] = np.minimum(
+            np.arange(MAX_PATIENCE + 1) + 1, MAX_PATIENCE)
+
+        # Every input to the decision logic is low-cardinality, so run
+        # _act_core offline over all (month, temp state, CO2 band, patience)
+        # combinations once and reduce act() to a single table lookup.
+        # temp_state: 0 = in band, 1 = too cold, 2 = too hot.
+        self._table = np.zeros(
+            (13, 3, 4, MAX_PATIENCE + 1, MAX_PATIENCE + 1), dtype=np.int64)
+        co2_reps = (400.0, 900.0, 1100.0, 1300.0)
+        for month in range(1, 13):
+            t_low = float(self._comfort_lo[month])
+            t_high = float(self._comfort_hi[month])
+            temp_reps = (0.5 * (t_low + t_high), t_low - 1.0, t_high + 1.0)
+            for ts, air_temp in enumerate(temp_reps):
+                for cb, air_co2 in enumerate(co2_reps):
+                    for tp in range(MAX_PATIENCE + 1):
+                        # _act_core updates the counters itself, so feed it
+                        # pre-update values that land on (tp, cp). Slots a
+                        # real trajectory cannot reach (e.g. out of band
+                        # with tp == 0) just get a harmless filler.
+                        tp_pre = max(tp - 1, 0) if ts else 0
+                        for cp in range(MAX_PATIENCE + 1):
+                            cp_pre = max(cp - 1, 0) if cb else 0
+                            if cb == 1 and cp == 0:
+                                # air_co2 == 800.0 exactly: bisect puts it
+                                # in bucket 1 but the strict > 800 patience
+                                # test does not fire, so this slot IS
+                                # reachable and must hold a zero-residual
+                                # action. Use the boundary itself as the
+                                # representative so the core agrees.
+                                co2_rep = 800.0
+                            else:
+                                co2_rep = air_co2
+                            action_idx, _, _ = _act_core(
+                                month, air_temp, co2_rep, tp_pre, cp_pre,
+                                self._comfort_lo, self._comfort_hi)
+                            self._table[month, ts, cb, tp, cp] = action_idx
 
     def _decide_window_fan_speed(self, co2: float) -> float:
         """Piecewise rule to decide WF speed based on CO₂ level."""
-        if co2 < 800.0:
-            return 0.0
-        elif co2 < 1000.0:
-            return 0.5
-        elif co2 < 1200.0:
-            return 0.75
-        else:
-            return 1.0
+        return _CO2_SPEEDS[bisect.bisect_right(_CO2_BOUNDS, float(co2))]
 
     def _find_best_action_index(self, desired_action):
         """
         Given desired [htg_sp, clg_sp, fan, wf] (floats),
         choose the closest index from DISCRETE_ACTIONS.
         """
-        diffs = DISCRETE_ACTIONS - np.array(desired_action, dtype=float)
-        dists = np.linalg.norm(diffs, axis=1)
-        return int(np.argmin(dists))
+        try:
+            return ACTION_LUT[(float(desired_action[0]),
+                               float(desired_action[1]),
+                               float(desired_action[2]),
+                               float(desired_action[3]))]
+        except KeyError:
+            # Off-grid action: nearest neighbour via the squared-distance
+            # identity — one matvec instead of a diff/square/sum/sqrt pass.
+            # This path is cold (act() stays on the exact grid), so it is
+            # not worth a compiled extension.
+            q = np.asarray(desired_action, dtype=np.float32)
+            d = _DA_SQNORMS - 2.0 * (DISCRETE_ACTIONS @ q)
+            return int(d.argmin())
     
     def _find_best_action_index_temp(self, desired_temp_pair):
         """
@@ -138,109 +271,41 @@ class RuleBasedControllerDiscrete:
         Given desired WF speed (float),
         choose the closest index from DISCRETE_ACTIONS_CO2.
         """
-        diffs = np.abs(DISCRETE_ACTIONS_CO2 - float(desired_wf_speed))
-        return int(np.argmin(diffs))
+        try:
+            return CO2_IDX[float(desired_wf_speed)]
+        except KeyError:
+            # Off-grid speed: fall back to the nearest-value scan.
+            diffs = np.abs(DISCRETE_ACTIONS_CO2 - float(desired_wf_speed))
+            return int(np.argmin(diffs))
 
     def act(self, obs, temp_patience, co2_patience):
         """
-        Main policy function.
-        :param obs: numpy array or list of shape (15,) (observation vector)
-        :param temp_patience: int, previous temp patience counter
-        :param co2_patience: int, previous CO2 patience counter
-        :return: (action_idx, temp_patience, co2_patience)
+        Main policy function, vectorized over a batch of environments.
+        :param obs: array of shape (N, 15) (one observation row per env)
+        :param temp_patience: int array of shape (N,)
+        :param co2_patience: int array of shape (N,)
+        :return: (action_idx, temp_patience, co2_patience), each shape (N,)
         """
-        obs = np.array(obs, dtype=float)
-
-        # Unpack observation
-        month    = int(obs[0])
-        air_temp = float(obs[7])
-        air_co2  = float(obs[10])
-
-        # 1) Determine comfort range
-        t_low, t_high = self._get_comfort_range(month)
-        target_temp = 0.5 * (t_low + t_high)
-
-        # --- Update patience counters properly ---
-        if air_temp > t_high or air_temp < t_low:
-            temp_patience += 1
-        else:
-            temp_patience = 0
-
-        if air_co2 > 800:
-            co2_patience += 1
-        else:
-            co2_patience = 0
-
-        # 2) Decide if AC should be on or off-like
-        if air_temp > t_high:
-            ac_on = True   # Too hot -> cooling
-        elif air_temp < t_low:
-            ac_on = True   # Too cold -> heating
-        else:
-            ac_on = False  # Inside comfort band
-
-        # 3) Base WF speed from CO2
-        wf_speed = self._decide_window_fan_speed(air_co2)
-
-        # 4) Base heating/cooling setpoints + fan
-        if not ac_on:
-            # Use AC off-like behaviour: [5, 50, 0, wf_speed]
-            heating_sp = 5.0
-            cooling_sp = 50.0
-            fan_speed = 0.0
-        else:
-            # AC on: choose heating/cooling setpoints around target_temp
-            heating_sp = float(np.clip(np.floor(target_temp), 21, 29))
-            cooling_sp = float(np.clip(heating_sp + 1.0, 22, 30))
-            fan_speed  = 1.0  # ON
-
-        # 5) Map to discrete temp / CO2 indices
-        base_temp_idx = self._find_best_action_index_temp([heating_sp, cooling_sp])
-        base_co2_idx = self._find_best_action_index_co2(wf_speed)
-
-        temp_patience_residual = temp_patience // TEMP_THRESHOLD
-        co2_patience_residual = co2_patience // TEMP_THRESHOLD
-
-        # Adjust temp index based on sign of error + patience (your original logic)
-        if not ac_on:
-            temp_index = 0
-        else:
-
-            if air_temp > t_high:
-                # "Too hot" branch in your version
-                temp_index = max(base_temp_idx - temp_patience_residual,
-                                1)
-            elif air_temp < t_low:
-                # "Too cold" branch in your version
-                temp_index = min(base_temp_idx + temp_patience_residual, len(DISCRETE_ACTIONS_TEMP) - 1)
-            else:
-                temp_index = base_temp_idx
-
-        #  Clamp temp_index to valid range [0, len(DISCRETE_ACTIONS_TEMP)-1]
-        temp_index = max(0, min(temp_index, len(DISCRETE_ACTIONS_TEMP) - 1))
-
-        # Adjust CO2 index monotonically upwards with patience
-        co2_index = min(base_co2_idx + co2_patience_residual,
-                        len(DISCRETE_ACTIONS_CO2) - 1)
-
-        #  Clamp co2_index to valid range [0, len(DISCRETE_ACTIONS_CO2)-1]
-        co2_index = max(0, min(co2_index, len(DISCRETE_ACTIONS_CO2) - 1))
-
-        # 6) Read back discrete values
-        htg_sp, clg_sp = DISCRETE_ACTIONS_TEMP[temp_index]
-        wf_sp = DISCRETE_ACTIONS_CO2[co2_index]
-
-        # Final desired 4D continuous action
-        desired_action = [float(htg_sp),
-                          float(clg_sp),
-                          float(fan_speed),
-                          float(wf_sp)]
-
-        # 7) Map to closest discrete action index [0, 39]
-        action_idx = self._find_best_action_index(desired_action)
-
-        # Safety: never allow undefined actions
-        if action_idx >= len(DISCRETE_ACTIONS):
-            action_idx = len(DISCRETE_ACTIONS) - 1
+        obs = np.asarray(obs, dtype=float)
+        month    = obs[:, 0].astype(np.int64)
+        air_temp = obs[:, 7]
+        air_co2  = obs[:, 10]
+
+        t_low = self._comfort_lo[month]
+        t_high = self._comfort_hi[month]
+
+        # Discretize the state and read the precomputed answers.
+        temp_state = (air_temp < t_low) + 2 * (air_temp > t_high)
+        co2_bucket = np.searchsorted(_CO2_BOUNDS_ARR, air_co2, side='right')
+
+        temp_patience = self._patience_next[
+            (temp_state != 0).astype(np.int64),
+            np.minimum(temp_patience, MAX_PATIENCE)]
+        co2_patience = self._patience_next[
+            (air_co2 > 800.0).astype(np.int64),
+            np.minimum(co2_patience, MAX_PATIENCE)]
+
+        action_idx = self._table[month, temp_state, co2_bucket,
+                                 temp_patience, co2_patience]
 
         return action_idx, temp_patience, co2_patience